@@ -1,6 +1,8 @@
-import csv
+import concurrent.futures
+import mmap
 import os
 import subprocess
+import threading
 import time
 from typing import List
 
@@ -12,12 +14,24 @@ NUM_SUBGROUPS        = 10000
 # ---------------------------------------------------------------
 # Slurm / cluster-specific parameters (edit to match your cluster)
 # ---------------------------------------------------------------
-JOB_SCRIPT_DIR      = "data/q2/slurm_query_jobs"          # Where SBATCH files will be written
+JOB_SCRIPT_DIR      = "data/q2/slurm_query_jobs"          # Where the array SBATCH file is written
 JOB_OUTPUT_DIR      = "data/q2/slurm_query_logs"          # Stdout / stderr directory
 QUERY_MEM           = "10G"                        # Memory per job
 QUERY_TIME          = "48:00:00"                  # Wall-time per job
 CPUS_PER_TASK       = 2                            # vCPUs per job
 MAX_JOBS_RUNNING    = 20                          # Concurrency limit
+RESUME_FROM         = 0                           # First subgroup index to (re)submit
+# Subgroup indices to leave out of a (re)submission run, e.g. chunks that
+# already completed. frozenset: O(1) membership, built once at import.
+SKIP_IDX            = frozenset()
+
+
+# TTL cache for free_connections_exceed: pg_stat_activity scans every
+# backend (under ProcArrayLock), so polling loops shouldn't re-run it
+# more than once per few seconds. Keyed per threshold, since limit_jobs
+# probes several thresholds (15/30) within one tick.
+_FREE_CONN_TTL = 8.0
+_free_conn_cache: dict = {}     # threshold -> (checked_at, value)
 
 
 def free_connections_exceed(threshold: int = 10) -> bool:
@@ -25,13 +39,22 @@ def free_connections_exceed(threshold: int = 10) -> bool:
     Check whether the number of available (non-superuser) connection slots
     in the PostgreSQL server exceeds the given threshold.
 
+    Results are cached for a few seconds (monotonic-time TTL), so tight
+    throttle loops reuse the last answer instead of re-scanning
+    pg_stat_activity on every tick.
+
     Args:
         threshold (int): The minimum number of free connections to compare against.
 
     Returns:
         bool: True if free connections > threshold, False otherwise.
     """
-    query = f"""
+    now = time.monotonic()
+    cached = _free_conn_cache.get(threshold)
+    if cached and now - cached[0] < _FREE_CONN_TTL:
+        return cached[1]
+
+    query = """
     WITH
         cfg AS (
             SELECT
@@ -43,99 +66,417 @@ def free_connections_exceed(threshold: int = 10) -> bool:
             FROM   pg_stat_activity
         )
     SELECT
-        (cfg.max_conn - cfg.super_res - used.active_cnt) > {threshold}  AS free_more_than_threshold
+        (cfg.max_conn - cfg.super_res - used.active_cnt) > :threshold  AS free_more_than_threshold
     FROM cfg, used;
     """
 
-    result = execute_pg_query(query)
+    result = execute_pg_query(query, {"threshold": threshold})
     row = result.fetchone()     # fetch the single-row result
-    return bool(row[0])
+
+    value = bool(row[0])
+    _free_conn_cache[threshold] = (now, value)
+    return value
 
 # ------------------------------------------------------------------
 # NEW 1 – count_lines(): number of lines (no memory cost like wc -l)
 # ------------------------------------------------------------------
 def count_lines(file_path: str) -> int:
-    """Return number of data lines (excluding header) using `wc -l`."""
-    out = subprocess.check_output(["wc", "-l", file_path], text=True)
-    total = int(out.strip().split()[0]) - 1      # minus header
-    return total
+    """
+    Return number of data lines (excluding header) by counting newline
+    bytes over an mmap of the file — no subprocess, the counting runs in C,
+    and the pages stay in the OS cache for later readers.
+    """
+    if os.path.getsize(file_path) == 0:
+        return -1                                # empty file: not even a header
+
+    total = 0
+    with open(file_path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            # Tell the kernel the scan is one sequential pass so it reads
+            # ahead aggressively and drops pages behind the cursor
+            if hasattr(mm, "madvise"):
+                mm.madvise(mmap.MADV_SEQUENTIAL)
+            view = memoryview(mm)
+            # mmap has no count(); scan the mapping in 8 MiB slices
+            for off in range(0, len(view), 8 << 20):
+                total += bytes(view[off:off + (8 << 20)]).count(b"\n")
+            view.release()
+    return total - 1                             # minus header
 
 # ------------------------------------------------------------------
-# NEW 2 – iter_id_ranges(): yields (min_id, max_id) ranges in streaming
-#       No full list held; reads the file only once more
+# NEW 2 – iter_id_ranges(): yields (min_id, max_id) ranges
+#       Seeks directly to chunk boundaries when lines are fixed-width;
+#       falls back to a streaming scan otherwise
 # ------------------------------------------------------------------
-def iter_id_ranges(file_path: str, num_subgroups: int):
+def detect_fixed_line_layout(file_path: str, sample_lines: int = 1000):
     """
-    Yield contiguous (min_id, max_id) tuples, assuming IDs are pre-sorted.
+    Check whether the index CSV has fixed-width data lines.
+
+    Reads the header plus up to *sample_lines* data lines and verifies they
+    all share one length, then cross-checks that the file size is an exact
+    multiple of that length past the header.
+
+    Returns:
+        (header_len, line_len) if the layout is fixed-width, else None.
+    """
+    with open(file_path, "rb") as f:
+        header = f.readline()
+        first = f.readline()
+        if not header or not first or not first.endswith(b"\n"):
+            return None
+
+        line_len = len(first)
+        for _ in range(sample_lines):
+            line = f.readline()
+            if not line:
+                break
+            if line.endswith(b"\n") and len(line) != line_len:
+                return None
+
+    if (os.path.getsize(file_path) - len(header)) % line_len != 0:
+        return None
+    return len(header), line_len
+
+
+def _iter_id_ranges_seek(file_path: str, num_subgroups: int,
+                         header_len: int, line_len: int, start: int = 0):
+    """
+    Yield (min_id, max_id) per chunk by seeking straight to chunk
+    boundaries — O(num_subgroups) small reads instead of scanning every
+    line of the index file. *start* skips that many leading chunks without
+    reading them (O(1) resume).
+    """
+    total_lines = (os.path.getsize(file_path) - header_len) // line_len
+    chunk_size  = (total_lines + num_subgroups - 1) // num_subgroups
+
+    with open(file_path, "rb") as f:
+        for i in range(start, num_subgroups):
+            start_row = i * chunk_size
+            if start_row >= total_lines:
+                break
+            end_row = min((i + 1) * chunk_size, total_lines) - 1
+
+            f.seek(header_len + start_row * line_len)
+            first_id = f.readline().split(b",", 1)[0].strip().decode()
+            f.seek(header_len + end_row * line_len)
+            last_id = f.readline().split(b",", 1)[0].strip().decode()
+            yield first_id, last_id
+
+
+SAMPLE_ROWS = 1000      # Rows sampled to estimate the mean line width
+
+
+def _estimate_total_lines(file_path: str) -> int:
+    """
+    Estimate the number of data lines from the file size and the mean
+    byte-width of the first SAMPLE_ROWS rows — no full counting pass.
+    """
+    with open(file_path, "rb") as f:
+        header_len = len(f.readline())
+        sampled_bytes = n_sampled = 0
+        for line in f:
+            sampled_bytes += len(line)
+            n_sampled += 1
+            if n_sampled == SAMPLE_ROWS:
+                break
+
+    if n_sampled == 0:
+        return 0
+    mean_row = sampled_bytes / n_sampled
+    return max(1, round((os.path.getsize(file_path) - header_len) / mean_row))
+
+
+def _iter_id_ranges_stream(file_path: str, num_subgroups: int, start: int = 0):
+    """
+    Streaming fallback for variable-width lines — a single pass over the
+    file.
 
     • Uses O(1) memory.
-    • Reads the file sequentially; chunk size = ceil(total_lines / num_subgroups).
+    • Chunk size comes from an estimated line count (file size / mean row
+      width over a short sample), so no separate counting pass is needed;
+      the resulting chunks may drift slightly from an exact split, which
+      is fine — consumers only need contiguous ID ranges.
+    • *start* leading chunks are skipped (their rows are still read, since
+      variable-width lines cannot be seeked over).
     """
-    total_lines = count_lines(file_path)
+    total_lines = _estimate_total_lines(file_path)
     chunk_size  = (total_lines + num_subgroups - 1) // num_subgroups
 
-    with open(file_path, newline='', encoding='utf-8') as f:
-        reader = csv.reader(f)
-        next(reader)                             # skip header
+    # Binary reads + split(b",", 1): only the first column is needed, so
+    # the csv state machine is pure overhead on a 200M-line index
+    with open(file_path, "rb") as f:
+        next(f)                                  # skip header
 
-        first_id, count = None, 0
-        for row in reader:
+        # Skip the rows belonging to the first *start* chunks
+        for _ in range(start * chunk_size):
+            next(f, None)
+
+        first_id, last_id, count = None, None, 0
+        for line in f:
+            row_id = line.split(b",", 1)[0].strip()
             if not first_id:
-                first_id = row[0]
+                first_id = row_id
+            last_id = row_id
             count += 1
 
             if count == chunk_size:
-                yield first_id, row[0]           # close chunk
+                yield first_id.decode(), last_id.decode()   # close chunk
                 first_id, count = None, 0
 
         # last partial chunk
         if first_id:
-            yield first_id, row[0]
+            yield first_id.decode(), last_id.decode()
+
+
+def convert_index_to_parquet(csv_path: str, parquet_path: str,
+                             chunk_size: int) -> None:
+    """
+    One-off migration: rewrite the (sorted) ID index CSV as Parquet with
+    row groups sized to the subgroup chunk, so range bounds can later be
+    read from row-group metadata without parsing any CSV.
+    """
+    # pyarrow is only needed for the Parquet index variant
+    from pyarrow import csv as pacsv
+    import pyarrow.parquet as pq
+
+    table = pacsv.read_csv(csv_path)
+    pq.write_table(table, parquet_path, row_group_size=chunk_size)
+
+
+def iter_id_ranges_parquet(parquet_path: str, chunk_size: int):
+    """
+    Yield (min_id, max_id) per chunk from a Parquet ID index.
+
+    Arrow returns each batch as a contiguous column buffer, so the bounds
+    are just the first/last element — no per-row Python parsing at all.
+    """
+    import pyarrow.parquet as pq
+
+    pf = pq.ParquetFile(parquet_path)
+    for batch in pf.iter_batches(batch_size=chunk_size, columns=["id"]):
+        ids = batch.column(0)
+        yield str(ids[0].as_py()), str(ids[-1].as_py())
+
+
+def iter_id_ranges(file_path: str, num_subgroups: int, start: int = 0):
+    """
+    Yield contiguous (min_id, max_id) tuples, assuming IDs are pre-sorted.
+
+    When the index CSV has fixed-width lines (the common case for the
+    numeric ID export), chunk boundaries are computed from the file size
+    and read with direct seeks; otherwise the whole file is streamed once.
+    *start* resumes from that chunk index — with fixed-width lines the
+    skipped chunks cost nothing, so restarting the submitter is O(1).
+    """
+    layout = detect_fixed_line_layout(file_path)
+    if layout:
+        yield from _iter_id_ranges_seek(file_path, num_subgroups, *layout,
+                                        start=start)
+    else:
+        yield from _iter_id_ranges_stream(file_path, num_subgroups, start=start)
 # ---------------------------------------------------------------
 # Utility – throttle concurrent jobs
 # ---------------------------------------------------------------
+SQUEUE_ID_BATCH = 1000      # Max job IDs per squeue call (keeps argv small)
+# Seconds between squeue refreshes in the background cache (see SqueueCache)
+SQUEUE_POLL_INTERVAL = int(os.getenv("SQUEUE_POLL_INTERVAL", "10"))
+
+
+class SqueueCache:
+    """
+    Background cache of our Slurm job states.
+
+    Spawns a single long-lived `squeue --me -i <interval>` subprocess and a
+    daemon thread that parses its repeating output into an in-memory
+    dict[job_id] -> state. limit_jobs() can then check job liveness from
+    memory instead of shelling out on every poll — one persistent RPC
+    channel to slurmctld instead of a new squeue per iteration.
+    """
+
+    def __init__(self, interval: int = SQUEUE_POLL_INTERVAL):
+        self.states: dict = {}
+        # Snapshot generation counter: 0 until the first full squeue
+        # iteration has been parsed, then +1 per swap. Jobs submitted
+        # around a swap record the generation they were submitted under
+        # (see mark_submitted) so a snapshot that predates them cannot
+        # declare them dead.
+        self.generation = 0
+        self._submit_gen: dict = {}
+        self._lock = threading.Lock()
+        self._proc = subprocess.Popen(
+            ["squeue", "--me", "-h", "-i", str(interval), "-o", "%i %T"],
+            stdout=subprocess.PIPE,
+            text=True,
+        )
+        self._thread = threading.Thread(target=self._reader, daemon=True)
+        self._thread.start()
+
+    def _reader(self) -> None:
+        """Parse squeue's repeating output; each iteration ends with a blank line."""
+        current: dict = {}
+        for line in self._proc.stdout:
+            line = line.strip()
+            if not line:
+                # End of one squeue iteration – swap in the fresh snapshot
+                with self._lock:
+                    self.states = current
+                    self.generation += 1
+                current = {}
+                continue
+            parts = line.split()
+            if len(parts) == 2:
+                current[parts[0]] = parts[1]
+
+    def mark_submitted(self, job_id: str) -> None:
+        """Record the snapshot generation *job_id* was submitted under."""
+        with self._lock:
+            self._submit_gen[str(job_id)] = self.generation
+
+    def alive_ids(self, job_queue: List[str]) -> set:
+        """
+        Return the subset of *job_queue* considered still alive.
+
+        A job counts as alive if it appears in the last snapshot, or if
+        that snapshot cannot be trusted to contain it yet: before the
+        first snapshot has been parsed, everything is alive, and a job
+        submitted under generation g is only trusted absent from
+        generation g+2 onward (the iteration producing g+1 may have been
+        in flight when the job was submitted and missed it).
+
+        If the sidecar squeue process has died (controller restart, OOM
+        kill), its snapshot is frozen and can never be trusted again, so
+        liveness degrades to direct batched squeue calls.
+        """
+        if self._proc.poll() is not None:
+            return squeue_alive_ids(job_queue)
+
+        with self._lock:
+            states = self.states
+            generation = self.generation
+            submit_gen = dict(self._submit_gen)
+
+        if generation == 0:
+            return {str(job) for job in job_queue}
+
+        return {
+            str(job) for job in job_queue
+            if str(job) in states
+            or submit_gen.get(str(job), -1) >= generation - 1
+        }
+
+
+_squeue_cache = None
+
+
+def get_squeue_cache() -> SqueueCache:
+    """Create the background squeue cache on first use and reuse it afterwards."""
+    global _squeue_cache
+    if _squeue_cache is None:
+        _squeue_cache = SqueueCache()
+    return _squeue_cache
+
+
+def squeue_alive_ids(job_queue: List[str]) -> set:
+    """
+    Return the set of job IDs from *job_queue* that are still known to Slurm
+    (PENDING or RUNNING), using a single `squeue` call instead of one
+    subprocess per job.
+
+    IDs are joined with commas and passed to one `squeue -h -o %i -j ...`
+    invocation; for very long queues the list is chunked so the argument
+    stays well below ARG_MAX.
+    """
+    alive: set = set()
+    for i in range(0, len(job_queue), SQUEUE_ID_BATCH):
+        batch = job_queue[i:i + SQUEUE_ID_BATCH]
+        proc = subprocess.run(
+            ["squeue", "-h", "-o", "%i", "-j", ",".join(map(str, batch))],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True
+        )
+        if proc.returncode != 0 and "Invalid job id" not in proc.stderr:
+            # Transient squeue/controller failure: treating the batch as
+            # finished could overrun the limit, so keep it alive and let the
+            # next poll reconcile. ("Invalid job id" just means the jobs
+            # already left the queue — those really are done.)
+            alive.update(map(str, batch))
+            continue
+        alive.update(proc.stdout.split())
+    return alive
+
+
+def count_completed_results(output_dir: str = SUBGROUP_RESULTS_DIR) -> int:
+    """
+    Scheduler-free completion signal: count the subgroup result CSVs that
+    already exist. Each job writes exactly one CSV when it finishes, so the
+    file count tracks completions with zero slurmctld RPCs.
+    """
+    try:
+        with os.scandir(output_dir) as entries:
+            return sum(1 for e in entries if e.name.endswith(".csv"))
+    except FileNotFoundError:
+        return 0
+
+
+# Bounds for the adaptive polling delay in limit_jobs
+POLL_DELAY_MIN = 5
+POLL_DELAY_MAX = 60
+
+
 def limit_jobs(job_queue: List[str], max_jobs_running: int) -> List[str]:
     """
     Wait until strictly fewer than *max_jobs_running* Slurm jobs from job_queue
     are still present in the queue (PENDING or RUNNING), then return the
     updated list of still-running job IDs.
+
+    The polling cadence adapts to observed completions: the delay halves
+    whenever jobs drained since the last check and doubles when nothing
+    changed, clamped to [POLL_DELAY_MIN, POLL_DELAY_MAX] seconds.
     """
-    while True:
-        still_running: List[str] = []
-        for job in job_queue:
-            proc = subprocess.run(
-                ["squeue", "-h", "-j", str(job)],  # -h → no header
-                stdout=subprocess.PIPE,
-                text=True
-            )
-            # If stdout not empty ⇒ job still exists
-            if proc.stdout.strip():
-                still_running.append(job)
+    delay = POLL_DELAY_MIN
+    prev_running = len(job_queue)
 
-        job_queue[:] = still_running  # update in place
+    while True:
+        # Check liveness against the background cache instead of shelling out
+        alive = get_squeue_cache().alive_ids(job_queue)
+        job_queue[:] = [job for job in job_queue if str(job) in alive]
 
         n_running = len(job_queue)
+        # Adapt: poll faster while the queue is draining, back off when static
+        if n_running < prev_running:
+            delay = max(POLL_DELAY_MIN, delay // 2)
+        else:
+            delay = min(POLL_DELAY_MAX, delay * 2)
+        prev_running = n_running
+
         # condition 1: much below limit
         if n_running < max_jobs_running - 50:
             print(f"Jobs finished, {n_running} running jobs remaining.")
-            time.sleep(5)  # give scheduler time to update
+            time.sleep(POLL_DELAY_MIN)  # give scheduler time to update
             return job_queue
         # condition 2: moderately below limit and enough free connections
         if n_running < max_jobs_running - 20 and free_connections_exceed(30):
             print(f"Jobs finished, {n_running} running jobs remaining.")
-            time.sleep(5)
+            time.sleep(POLL_DELAY_MIN)
             return job_queue
         # condition 3: just below limit and enough free connections
         if n_running < max_jobs_running and free_connections_exceed(15):
             print(f"Jobs finished, {n_running} running jobs remaining.")
-            time.sleep(15)
+            time.sleep(POLL_DELAY_MIN)
             return job_queue
 
-        # otherwise wait and retry
-        time.sleep(30)
+        # Otherwise wait *delay* seconds, waking early as soon as new result
+        # CSVs appear — a completed job always produces one, so this is a
+        # scheduler-free completion signal
+        completed_before = count_completed_results()
+        for _ in range(max(1, delay // POLL_DELAY_MIN)):
+            time.sleep(POLL_DELAY_MIN)
+            if count_completed_results() > completed_before:
+                break
 
 # ---------------------------------------------------------------
-# Core – create one SBATCH file per subgroup
+# Core – build one SBATCH script per subgroup (as a string)
 # ---------------------------------------------------------------
 def create_query_job(
     subgroup_idx: int,
@@ -143,24 +484,20 @@ def create_query_job(
     output_csv: str,
 ) -> str:
     """
-    Build a SBATCH script that queries a specific ID range and writes results
-    to *output_csv*.  Returns the path to the written script.
-    """
-    if not os.path.exists(JOB_SCRIPT_DIR):
-        os.makedirs(JOB_SCRIPT_DIR)
+    Build the SBATCH script that queries a specific ID range and writes
+    results to *output_csv*.  Returns the script TEXT — it is piped to
+    sbatch's stdin at submit time, so no script file ever touches disk.
 
-    if not os.path.exists(JOB_OUTPUT_DIR):
-        os.makedirs(JOB_OUTPUT_DIR)
-
-    job_name   = f"works_q_{subgroup_idx:03d}"
-    script_path = os.path.join(JOB_SCRIPT_DIR, f"{job_name}.sbatch")
+    Directory creation is the submitter's responsibility — no per-call
+    exists/makedirs probes here, since this runs once per subgroup.
+    """
+    job_name   = f"works_q_{subgroup_idx:05d}"
 
     stdout_file = os.path.join(JOB_OUTPUT_DIR, f"{job_name}.out")
     stderr_file = os.path.join(JOB_OUTPUT_DIR, f"{job_name}.err")
 
     # NOTE: Adapt the Python call below to point at your actual query runner
-    with open(script_path, "w") as sb:
-        sb.write(f"""#!/bin/bash
+    return f"""#!/bin/bash
 #SBATCH --job-name=q2_{job_name}
 #SBATCH --output={stdout_file}
 #SBATCH --error={stderr_file}
@@ -170,32 +507,52 @@ def create_query_job(
 #SBATCH --mail-user=oranbe@post.bgu.ac.il # users email for sending job status notifications
 #SBATCH --mail-type=END        # conditions for sending the email BEGIN,END,FAIL
 
-python data_mining/queries/parallel_queries/q2_get_work_year_institution_country_city_author.py "{id_range[0]}" "{id_range[1]}" "{output_csv}"
-""")
+# Trim per-job interpreter startup: no .pyc writes to shared storage,
+# no user site-packages scan, docstrings/asserts stripped
+export PYTHONDONTWRITEBYTECODE=1
+export PYTHONNOUSERSITE=1
 
-    return script_path
+python -OO data_mining/queries/parallel_queries/q2_get_work_year_institution_country_city_author.py "{id_range[0]}" "{id_range[1]}" "{output_csv}"
+"""
 
 
 # ---------------------------------------------------------------
 # Wrapper – generate SBATCH jobs for all subgroups and submit them
 # ---------------------------------------------------------------
 def submit_subgroup_jobs(index_csv: str, num_subgroups: int, output_dir: str) -> List[str]:
-    if not os.path.exists(output_dir):
-        os.makedirs(output_dir)
+    # Create all directories once up front instead of probing them per job
+    os.makedirs(JOB_OUTPUT_DIR, exist_ok=True)
+    os.makedirs(output_dir, exist_ok=True)
 
     job_queue: List[str] = []
 
-    for idx, (min_id, max_id) in enumerate(iter_id_ranges(index_csv, num_subgroups), start=1):
-        csv_path   = os.path.join(output_dir, f"subgroup_{idx:03d}.csv")
-        script_path = create_query_job(
+    # Resume by seeking straight to the RESUME_FROM-th chunk instead of
+    # scanning (and skipping) everything before it
+    for idx, (min_id, max_id) in enumerate(
+            iter_id_ranges(index_csv, num_subgroups, start=RESUME_FROM),
+            start=RESUME_FROM + 1):
+        if idx in SKIP_IDX:
+            continue
+
+        csv_path = os.path.join(output_dir, f"subgroup_{idx:05d}.csv")
+        script = create_query_job(
             subgroup_idx = idx,
             id_range     = (min_id, max_id),
             output_csv   = csv_path,
         )
 
         job_queue = limit_jobs(job_queue, MAX_JOBS_RUNNING)
-        submit = subprocess.run(["sbatch", script_path], stdout=subprocess.PIPE)
-        job_id = submit.stdout.decode().strip().split()[-1]
+        # Pipe the script to sbatch's stdin — no per-job file on shared
+        # storage; --parsable prints just the job ID, no banner parsing
+        submit = subprocess.run(
+            ["sbatch", "--parsable"],
+            input=script,
+            stdout=subprocess.PIPE, text=True, check=True
+        )
+        job_id = submit.stdout.strip()
+        # Tag the job with the current snapshot generation so the cache
+        # keeps it alive until a snapshot that could contain it arrives
+        get_squeue_cache().mark_submitted(job_id)
         job_queue.append(job_id)
 
         print(f"Submitted subgroup {idx}/{num_subgroups} (IDs {min_id}–{max_id}) – Job ID {job_id}")
@@ -203,6 +560,154 @@ def submit_subgroup_jobs(index_csv: str, num_subgroups: int, output_dir: str) ->
     return job_queue
 
 # ---------------------------------------------------------------
-job_ids = submit_subgroup_jobs(INDEX_FILE_PATH, NUM_SUBGROUPS, SUBGROUP_RESULTS_DIR)
-print(f"Submitted {len(job_ids)} jobs.")
+# Alternative – blocking submission via `sbatch --wait` workers
+# ---------------------------------------------------------------
+def submit_subgroup_jobs_wait(index_csv: str, num_subgroups: int,
+                              output_dir: str) -> List[str]:
+    """
+    Submit subgroups through a pool of MAX_JOBS_RUNNING `sbatch --wait`
+    workers instead of the limit_jobs polling loop.
+
+    Each worker thread blocks on sbatch's open RPC channel until its job
+    finishes, so completion is signalled by process exit — no squeue
+    polling and no 5–30 s wake-up quantum between submissions.
+    Returns the list of completed job IDs.
+    """
+    os.makedirs(JOB_OUTPUT_DIR, exist_ok=True)
+    os.makedirs(output_dir, exist_ok=True)
+
+    def submit_one(script: str) -> str:
+        # Script text goes to sbatch's stdin — no file on shared storage
+        proc = subprocess.run(
+            ["sbatch", "--wait", "--parsable"],
+            input=script,
+            stdout=subprocess.PIPE, text=True, check=True
+        )
+        return proc.stdout.strip()
+
+    job_ids: List[str] = []
+    pending: set = set()
+
+    with concurrent.futures.ThreadPoolExecutor(
+            max_workers=MAX_JOBS_RUNNING) as executor:
+        for idx, (min_id, max_id) in enumerate(
+                iter_id_ranges(index_csv, num_subgroups, start=RESUME_FROM),
+                start=RESUME_FROM + 1):
+            csv_path = os.path.join(output_dir, f"subgroup_{idx:05d}.csv")
+            script = create_query_job(
+                subgroup_idx = idx,
+                id_range     = (min_id, max_id),
+                output_csv   = csv_path,
+            )
+
+            # Block until a worker slot frees instead of polling squeue
+            if len(pending) >= MAX_JOBS_RUNNING:
+                done, pending = concurrent.futures.wait(
+                    pending, return_when=concurrent.futures.FIRST_COMPLETED
+                )
+                job_ids.extend(f.result() for f in done)
+
+            pending.add(executor.submit(submit_one, script))
+            print(f"Queued subgroup {idx}/{num_subgroups} (IDs {min_id}–{max_id})")
+
+        done, _ = concurrent.futures.wait(pending)
+        job_ids.extend(f.result() for f in done)
+
+    return job_ids
+
+
+# ---------------------------------------------------------------
+# Alternative – submit ALL subgroups as ONE Slurm job array
+# ---------------------------------------------------------------
+RANGES_FILE_PATH = "data/q2/ranges.tsv"
+
+
+def write_ranges_file(index_csv: str, num_subgroups: int, ranges_path: str) -> int:
+    """
+    Precompute every (min_id, max_id) pair once and store them as a TSV
+    (columns: idx, min_id, max_id) indexed by array task ID.
+
+    Returns the number of ranges written.
+    """
+    os.makedirs(os.path.dirname(ranges_path), exist_ok=True)
+
+    n_ranges = 0
+    with open(ranges_path, "w", newline="", encoding="utf-8") as f:
+        for idx, (min_id, max_id) in enumerate(
+                iter_id_ranges(index_csv, num_subgroups), start=1):
+            f.write(f"{idx}\t{min_id}\t{max_id}\n")
+            n_ranges = idx
+
+    return n_ranges
+
+
+def create_array_job(ranges_path: str, output_dir: str, n_ranges: int) -> str:
+    """
+    Write ONE SBATCH script that runs as a job array: each task looks up its
+    ID range in *ranges_path* via $SLURM_ARRAY_TASK_ID. The %<limit> suffix
+    lets the scheduler enforce the concurrency cap instead of limit_jobs.
+    Returns the path to the written script.
+    """
+    os.makedirs(JOB_SCRIPT_DIR, exist_ok=True)
+    os.makedirs(JOB_OUTPUT_DIR, exist_ok=True)
+
+    script_path = os.path.join(JOB_SCRIPT_DIR, "query_array.sbatch")
+    stdout_file = os.path.join(JOB_OUTPUT_DIR, "works_q_%a.out")
+    stderr_file = os.path.join(JOB_OUTPUT_DIR, "works_q_%a.err")
+
+    with open(script_path, "w") as sb:
+        sb.write(f"""#!/bin/bash
+#SBATCH --job-name=q2_works_array
+#SBATCH --array=1-{n_ranges}%{MAX_JOBS_RUNNING}
+#SBATCH --output={stdout_file}
+#SBATCH --error={stderr_file}
+#SBATCH --time={QUERY_TIME}
+#SBATCH --mem={QUERY_MEM}
+#SBATCH --cpus-per-task={CPUS_PER_TASK}
+#SBATCH --mail-user=oranbe@post.bgu.ac.il # users email for sending job status notifications
+#SBATCH --mail-type=END        # conditions for sending the email BEGIN,END,FAIL
+
+# Trim per-task interpreter startup: no .pyc writes to shared storage,
+# no user site-packages scan, docstrings/asserts stripped
+export PYTHONDONTWRITEBYTECODE=1
+export PYTHONNOUSERSITE=1
+
+# ranges.tsv line N holds the range for array task N (written 1..N in
+# order), so a positional sed lookup is enough — no field scan
+range=$(sed -n "${{SLURM_ARRAY_TASK_ID}}p" {ranges_path})
+min_id=$(echo "$range" | cut -f2)
+max_id=$(echo "$range" | cut -f3)
+out_csv={output_dir}/subgroup_$(printf %05d $SLURM_ARRAY_TASK_ID).csv
+
+python -OO data_mining/queries/parallel_queries/q2_get_work_year_institution_country_city_author.py "$min_id" "$max_id" "$out_csv"
+""")
+
+    return script_path
+
+
+def submit_subgroup_jobs_array(index_csv: str, num_subgroups: int, output_dir: str) -> str:
+    """
+    Submit every subgroup query as a single Slurm job array — one sbatch RPC
+    instead of one per subgroup, with concurrency throttled scheduler-side.
+    Returns the array job ID.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+
+    n_ranges = write_ranges_file(index_csv, num_subgroups, RANGES_FILE_PATH)
+    script_path = create_array_job(RANGES_FILE_PATH, output_dir, n_ranges)
+
+    submit = subprocess.run(
+        ["sbatch", "--parsable", script_path],
+        stdout=subprocess.PIPE, text=True, check=True
+    )
+    job_id = submit.stdout.strip()
+
+    print(f"Submitted job array {job_id} with {n_ranges} tasks "
+          f"(max {MAX_JOBS_RUNNING} concurrent).")
+    return job_id
+
+
+# ---------------------------------------------------------------
+array_job_id = submit_subgroup_jobs_array(INDEX_FILE_PATH, NUM_SUBGROUPS, SUBGROUP_RESULTS_DIR)
+print(f"Submitted array job {array_job_id}.")
 # ---------------------------------------------------------------
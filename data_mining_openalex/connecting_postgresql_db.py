@@ -1,44 +1,108 @@
+"""
+Shared PostgreSQL connection helpers.
+
+Connection details come from .env / environment variables. For large
+parallel runs, point DB_HOST/DB_PORT at a PgBouncer instance in
+transaction pooling mode (pool_mode=transaction, default_pool_size sized
+to the server's max_connections minus the superuser reserve): each Slurm
+job then borrows a backend only for the duration of its query instead of
+holding one for its whole lifetime, which removes the need to throttle
+submissions on free connection slots.
+
+Note that under transaction pooling, session state does not survive
+between transactions — session settings must use SET LOCAL inside the
+transaction that runs the query (see execute_pg_query's
+session_settings).
+"""
 from dotenv import load_dotenv
 import os
 from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 
-def create_db_session():
+# Resolve the connection settings exactly once, at import time.
+# load_dotenv() walks up the directory tree and parses the .env file, so
+# running it per call is wasted work (and risks picking up a stale .env in
+# child Slurm jobs that change cwd).
+load_dotenv()
+
+DB_USER = os.getenv('DB_USER')
+DB_PASSWORD = os.getenv('DB_PASSWORD')
+DB_HOST = os.getenv('DB_HOST')
+DB_PORT = os.getenv('DB_PORT', '5432')
+DB_NAME = os.getenv('DB_NAME')
+
+_DB_URL = f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+
+# POOL_MODE=null → no pooling (one connection per use); right for the
+# short-lived Slurm query jobs that run a single query and exit.
+# Default 'queue' keeps a regular pool for long-lived submitter processes.
+_POOL_MODE = os.getenv('POOL_MODE', 'queue')
+
+# Module-level engine and session factory, built once and reused so that
+# repeated queries share the same connection pool instead of paying a fresh
+# TCP/TLS/auth handshake per call
+_ENGINE = None
+_SESSION_FACTORY = None
+
+
+def get_engine():
     """
-    This function creates a database session using SQLAlchemy
-    after loading connection details from environment variables.
-    
+    Build the SQLAlchemy engine once (first call) and reuse it afterwards.
+
     Returns:
-        session (Session): The SQLAlchemy session object connected to PostgreSQL
+        engine (Engine): The shared SQLAlchemy engine connected to PostgreSQL
     """
-    # Load environment variables from .env file
-    load_dotenv()
+    global _ENGINE
+    if _ENGINE is None:
+        if _POOL_MODE == 'null':
+            _ENGINE = create_engine(_DB_URL, poolclass=NullPool)
+        else:
+            # pool_pre_ping revalidates pooled connections so long-running
+            # submitters survive idle timeouts. The driver script only ever
+            # needs a handful of connections (limit_jobs polling plus the
+            # odd export), so a small fixed pool keeps warm connections
+            # around for reuse without hogging server slots the Slurm jobs
+            # need.
+            _ENGINE = create_engine(
+                _DB_URL,
+                pool_pre_ping=True,
+                pool_size=4,
+                max_overflow=4,
+            )
+
+    return _ENGINE
 
-    # Get connection details from environment variables
-    DB_USER = os.getenv('DB_USER')
-    DB_PASSWORD = os.getenv('DB_PASSWORD')
-    DB_HOST = os.getenv('DB_HOST')
-    DB_PORT = os.getenv('DB_PORT', '5432')
-    DB_NAME = os.getenv('DB_NAME')
 
-    # Create the database connection string
-    db_string = f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+def create_db_session():
+    """
+    This function creates a database session using SQLAlchemy,
+    reusing the shared engine and its connection pool.
 
-    # Create the engine to connect SQLAlchemy to PostgreSQL
-    engine = create_engine(db_string)
+    Returns:
+        session (Session): The SQLAlchemy session object connected to PostgreSQL
+    """
+    global _SESSION_FACTORY
+    if _SESSION_FACTORY is None:
+        _SESSION_FACTORY = sessionmaker(bind=get_engine())
 
-    # Create a session to perform actions on the database
-    Session = sessionmaker(bind=engine)
-    session = Session()
-    
-    return session
+    return _SESSION_FACTORY()
 
-def execute_pg_query(query):
+def execute_pg_query(query, params=None, session_settings=None):
     """
     Executes a provided SQL query on the PostgreSQL database and returns the raw results.
 
     Args:
-        query (str): The SQL query to execute.
+        query (str): The SQL query to execute, with :name placeholders.
+        params (dict, optional): Bound parameter values for the placeholders.
+            Using bound parameters lets PostgreSQL reuse a cached plan for
+            repeated query shapes instead of re-parsing interpolated SQL.
+        session_settings (list, optional): SET statements (e.g.
+            "SET LOCAL max_parallel_workers_per_gather = 0") executed on the
+            same connection and inside the same transaction as the query, so
+            they are guaranteed to apply to it. Prefer SET LOCAL so the
+            setting cannot leak to other clients when connecting through a
+            transaction-pooling PgBouncer.
 
     Returns:
         result: The raw result object from executing the query.
@@ -47,8 +111,12 @@ def execute_pg_query(query):
     session = create_db_session()
 
     try:
+        # Apply session-level settings on the same connection as the query
+        for setting in session_settings or []:
+            session.execute(text(setting))
+
         # Execute the query and fetch all results
-        result = session.execute(text(query))
+        result = session.execute(text(query), params or {})
         return result
 
     finally:
@@ -56,6 +124,36 @@ def execute_pg_query(query):
         session.close()
 
 
+def stream_pg_query(query, params=None, yield_per=10_000, session_settings=None):
+    """
+    Executes a query with a server-side cursor and yields rows lazily.
+
+    Unlike execute_pg_query, the full result set is never materialized
+    client-side: stream_results + yield_per fetch rows in batches of
+    *yield_per* over a server-side cursor, keeping memory flat for
+    multi-million-row exports.
+
+    Args:
+        query (str): The SQL query to execute, with :name placeholders.
+        params (dict, optional): Bound parameter values for the placeholders.
+        yield_per (int): Number of rows fetched per round-trip.
+        session_settings (list, optional): SET statements executed on the
+            same connection right before the query (see execute_pg_query).
+
+    Yields:
+        Row: One result row at a time.
+    """
+    with get_engine().connect() as conn:
+        for setting in session_settings or []:
+            conn.execute(text(setting))
+
+        result = conn.execution_options(
+            stream_results=True, yield_per=yield_per
+        ).execute(text(query), params or {})
+        for row in result:
+            yield row
+
+
 def get_data_from_pg_db(query):
     """
     Retrieves data from PostgreSQL database using a provided query and returns it in dictionary format.
@@ -74,3 +172,26 @@ def get_data_from_pg_db(query):
     data = result.fetchall()
 
     return [dict(zip(columns, row)) for row in data]
+
+
+def get_dataframe_from_pg_db(query, params=None):
+    """
+    Retrieves data from PostgreSQL database and returns it as a pandas
+    DataFrame.
+
+    Unlike get_data_from_pg_db, no per-row Python dicts are built: the
+    result lands in columnar NumPy arrays, which downstream consumers
+    (aggregation, Matplotlib) can ingest through their C paths.
+
+    Args:
+        query (str): The SQL query to execute, with :name placeholders.
+        params (dict, optional): Bound parameter values for the placeholders.
+
+    Returns:
+        DataFrame: The query results, one column per selected field.
+    """
+    # Imported here so the many short-lived Slurm query jobs that use this
+    # module never pay pandas' import cost
+    import pandas as pd
+
+    return pd.read_sql_query(text(query), get_engine(), params=params)
@@ -0,0 +1,151 @@
+"""
+Single-node counterpart to cluster_parallel_query.py: runs the subgroup
+queries concurrently against PostgreSQL with asyncpg instead of fanning
+them out over Slurm.
+
+Concurrency model: one connection pool shared by all subgroups, an
+asyncio semaphore capping in-flight queries, and CSV writes handed off
+to a thread pool so disk I/O never blocks the event loop. Overlapping
+the subgroups hides per-query latency and keeps both the client and the
+server's buffer pool busy instead of idling between serial queries.
+"""
+import asyncio
+import concurrent.futures
+import csv
+import os
+
+import asyncpg
+
+from connecting_postgresql_db import (
+    DB_USER, DB_PASSWORD, DB_HOST, DB_PORT, DB_NAME,
+)
+
+RANGES_FILE_PATH     = "data/q2/ranges.tsv"
+SUBGROUP_RESULTS_DIR = "data/q2/subgroup_results"
+
+# Connection pool bounds and the cap on simultaneously running queries.
+# MAX_CONCURRENT_QUERIES stays below the pool max so acquire() never
+# serializes behind the semaphore.
+POOL_MIN_SIZE          = 4
+POOL_MAX_SIZE          = 16
+MAX_CONCURRENT_QUERIES = 8
+
+CSV_COLUMNS = [
+    "work_id",
+    "publication_year",
+    "institution_id",
+    "country",
+    "country_code",
+    "city",
+    "geonames_city_id",
+    "author_position",
+    "author_id",
+]
+
+# Same query shape as the cluster runner (q2), with asyncpg's positional
+# placeholders
+SUBGROUP_QUERY = """
+    SELECT
+        wa.work_id,
+        w.publication_year,
+        wa.institution_id,
+        ig.country,
+        ig.country_code,
+        ig.city,
+        ig.geonames_city_id,
+        wa.author_position,
+        wa.author_id
+    FROM   openalex.works             AS w
+    JOIN   openalex.works_authorships AS wa  ON w.id              = wa.work_id
+    JOIN   openalex.institutions_geo  AS ig  ON wa.institution_id = ig.institution_id
+    WHERE  w.id_int BETWEEN $1 AND $2
+      AND  w.publication_year    IS NOT NULL
+      AND  wa.author_position    IS NOT NULL
+      AND  ig.country            IS NOT NULL
+      AND  wa.author_id          IS NOT NULL
+"""
+
+
+def read_ranges_file(ranges_path: str = RANGES_FILE_PATH):
+    """
+    Yield (subgroup_idx, min_id, max_id) from the ranges.tsv written by
+    cluster_parallel_query.write_ranges_file.
+    """
+    with open(ranges_path) as f:
+        for line in f:
+            idx, min_id, max_id = line.split("\t")
+            yield int(idx), int(min_id), int(max_id)
+
+
+def _write_subgroup_csv(output_csv: str, rows: list) -> None:
+    """Blocking CSV write; runs in the thread pool, off the event loop."""
+    with open(output_csv, "w", newline="", encoding="utf-8",
+              buffering=1 << 20) as f:
+        writer = csv.writer(f)
+        writer.writerow(CSV_COLUMNS)
+        writer.writerows(rows)
+
+
+async def run_subgroup(pool, sem, executor, subgroup_idx: int,
+                       min_id: int, max_id: int, output_dir: str) -> int:
+    """
+    Run one subgroup query and save its result CSV.
+
+    The semaphore caps how many queries are in flight at once; the CSV
+    write is pushed to *executor* so the loop keeps driving the other
+    subgroups while this one hits the disk.
+
+    Returns:
+        int: Number of rows written for this subgroup.
+    """
+    output_csv = os.path.join(output_dir, f"subgroup_{subgroup_idx:05d}.csv")
+
+    async with sem:
+        async with pool.acquire() as conn:
+            rows = await conn.fetch(SUBGROUP_QUERY, min_id, max_id)
+
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(
+            executor, _write_subgroup_csv, output_csv, rows
+        )
+
+    print(f"Subgroup {subgroup_idx}: wrote {len(rows)} rows to '{output_csv}'")
+    return len(rows)
+
+
+async def process_subgroups(ranges_path: str = RANGES_FILE_PATH,
+                            output_dir: str = SUBGROUP_RESULTS_DIR) -> int:
+    """
+    Query every subgroup range in *ranges_path* concurrently and save one
+    CSV per subgroup into *output_dir*.
+
+    Returns:
+        int: Total rows written across all subgroups.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+
+    pool = await asyncpg.create_pool(
+        user=DB_USER, password=DB_PASSWORD,
+        host=DB_HOST, port=DB_PORT, database=DB_NAME,
+        min_size=POOL_MIN_SIZE, max_size=POOL_MAX_SIZE,
+    )
+    sem = asyncio.Semaphore(MAX_CONCURRENT_QUERIES)
+
+    try:
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=MAX_CONCURRENT_QUERIES
+        ) as executor:
+            counts = await asyncio.gather(*[
+                run_subgroup(pool, sem, executor, idx, min_id, max_id,
+                             output_dir)
+                for idx, min_id, max_id in read_ranges_file(ranges_path)
+            ])
+    finally:
+        await pool.close()
+
+    return sum(counts)
+
+
+if __name__ == "__main__":
+    total_rows = asyncio.run(process_subgroups())
+    print(f"Done: {total_rows} rows across all subgroups.")
@@ -0,0 +1,24 @@
+-- One-off migration: expose OpenAlex work IDs ("W" + digits) as bigint
+-- columns so range queries compare fixed-width integers instead of doing
+-- collation-aware text comparisons on the full id string.
+--
+-- Run once as a superuser / table owner before using the id_int range
+-- predicates in the query runners.
+
+ALTER TABLE openalex.works
+    ADD COLUMN IF NOT EXISTS id_int bigint
+    GENERATED ALWAYS AS (substr(id, 2)::bigint) STORED;
+
+CREATE INDEX IF NOT EXISTS works_id_int_idx
+    ON openalex.works (id_int);
+
+ALTER TABLE openalex.works_authorships
+    ADD COLUMN IF NOT EXISTS work_id_int bigint
+    GENERATED ALWAYS AS (substr(work_id, 2)::bigint) STORED;
+
+CREATE INDEX IF NOT EXISTS works_authorships_work_id_int_idx
+    ON openalex.works_authorships (work_id_int);
+
+-- Populate planner statistics for the new columns
+ANALYZE openalex.works;
+ANALYZE openalex.works_authorships;
@@ -23,7 +23,46 @@ base_dir = os.path.abspath(
 )
 if base_dir not in sys.path:
     sys.path.insert(0, base_dir)
-from connecting_postgresql_db import execute_pg_query
+from connecting_postgresql_db import get_engine, stream_pg_query
+
+# Exported fields, in the same order as the SELECT below
+CSV_COLUMNS = [
+    "work_id",
+    "publication_year",
+    "institution_id",
+    "country",
+    "country_code",
+    "city",
+    "geonames_city_id",
+    "author_position",
+    "author_id",
+]
+
+# Rows fetched per server-side-cursor round-trip in the fallback export
+EXPORT_BATCH_SIZE = 10_000
+
+# Query shape shared by both export paths; the bound-placeholder syntax
+# differs per driver, so it is injected via {min_ph}/{max_ph}
+QUERY_TEMPLATE = """
+    SELECT
+        wa.work_id,
+        w.publication_year,
+        wa.institution_id,
+        ig.country,
+        ig.country_code,
+        ig.city,
+        ig.geonames_city_id,
+        wa.author_position,
+        wa.author_id
+    FROM   openalex.works             AS w
+    JOIN   openalex.works_authorships AS wa  ON w.id              = wa.work_id
+    JOIN   openalex.institutions_geo  AS ig  ON wa.institution_id = ig.institution_id
+    WHERE  w.id_int BETWEEN {min_ph} AND {max_ph}
+      AND  w.publication_year    IS NOT NULL
+      AND  wa.author_position    IS NOT NULL
+      AND  ig.country            IS NOT NULL
+      AND  wa.author_id          IS NOT NULL
+"""
 
 
 def parse_args() -> argparse.Namespace:
@@ -36,68 +75,99 @@ def parse_args() -> argparse.Namespace:
     return parser.parse_args()
 
 
-def main() -> None:
-    args = parse_args()
-    os.makedirs(os.path.dirname(args.output_csv), exist_ok=True)
+def work_id_to_int(work_id: str) -> int:
+    """Convert an OpenAlex work ID ('W12345' or '12345') to its bigint form."""
+    return int(str(work_id).lstrip("Ww"))
 
-    print(
-        f"[{datetime.now():%Y-%m-%d %H:%M:%S}] "
-        f"Querying works.id BETWEEN '{args.min_id}' AND '{args.max_id}'"
-    )
 
-    # Updated SQL query with additional geo columns and author_id filter
-    sql = f"""
-        SELECT
-            wa.work_id,
-            w.publication_year,
-            wa.institution_id,
-            ig.country,
-            ig.country_code,
-            ig.city,
-            ig.geonames_city_id,
-            wa.author_position,
-            wa.author_id
-        FROM   openalex.works             AS w
-        JOIN   openalex.works_authorships AS wa  ON w.id              = wa.work_id
-        JOIN   openalex.institutions_geo  AS ig  ON wa.institution_id = ig.institution_id
-        WHERE  w.id BETWEEN '{args.min_id}' AND '{args.max_id}'
-          AND  w.publication_year    IS NOT NULL
-          AND  wa.author_position    IS NOT NULL
-          AND  ig.country            IS NOT NULL
-          AND  wa.author_id          IS NOT NULL;
+def export_with_copy(params: dict, output_csv: str) -> int:
+    """
+    Stream the query result straight into *output_csv* with server-side
+    COPY: PostgreSQL formats the CSV in C, no Python row objects are ever
+    built, and RSS stays flat regardless of result size.
+    Returns the number of exported rows.
     """
+    sql = QUERY_TEMPLATE.format(min_ph="%(min_id)s", max_ph="%(max_id)s")
 
+    conn = get_engine().raw_connection()
     try:
-        # disable parallel workers if needed, then run the main query
-        result = execute_pg_query("SET max_parallel_workers_per_gather = 0; " + sql)
-    except Exception as exc:
-        print(f"DB query failed: {exc}", file=sys.stderr)
-        sys.exit(1)
+        cur = conn.cursor()
+        # disable parallel workers on the same connection that runs the COPY
+        cur.execute("SET LOCAL max_parallel_workers_per_gather = 0;")
+        # COPY cannot bind parameters itself; mogrify renders them safely
+        copy_sql = cur.mogrify(sql, params).decode()
+        with open(output_csv, "wb") as f:
+            cur.copy_expert(f"COPY ({copy_sql}) TO STDOUT WITH CSV HEADER", f)
+        return cur.rowcount
+    finally:
+        conn.close()
+
+
+def export_with_select(params: dict, output_csv: str) -> int:
+    """
+    Fallback export path: stream the SELECT over a server-side cursor and
+    drain it into csv.writer.writerows, so neither the result set nor any
+    batch is ever fully materialized. Bound parameters keep the query
+    shape constant across subgroup jobs so the backend can reuse a cached
+    plan.
+    Returns the number of exported rows.
+    """
+    sql = QUERY_TEMPLATE.format(min_ph=":min_id", max_ph=":max_id")
 
     row_count = 0
     try:
-        with open(args.output_csv, "w", newline="", encoding="utf-8") as f:
-            writer = csv.writer(f)
-            # write header with all exported fields
-            writer.writerow([
-                "work_id",
-                "publication_year",
-                "institution_id",
-                "country",
-                "country_code",
-                "city",
-                "geonames_city_id",
-                "author_position",
-                "author_id",
-            ])
-            for row in result:
-                # row is a sequence of 9 values in the same order as SELECT
-                writer.writerow(row)
+        rows = stream_pg_query(
+            sql,
+            params,
+            yield_per=EXPORT_BATCH_SIZE,
+            session_settings=["SET LOCAL max_parallel_workers_per_gather = 0"],
+        )
+
+        def counted(rows_iter):
+            nonlocal row_count
+            for row in rows_iter:
                 row_count += 1
+                yield row
+
+        # Large buffer coalesces the writer's many small writes into few
+        # syscalls; writerows drains the iterator in one C-level call
+        with open(output_csv, "w", newline="", encoding="utf-8",
+                  buffering=1 << 20) as f:
+            writer = csv.writer(f)
+            writer.writerow(CSV_COLUMNS)
+            writer.writerows(counted(rows))
     except Exception as exc:
-        print(f"Failed to write CSV '{args.output_csv}': {exc}", file=sys.stderr)
+        print(f"Failed to export CSV '{output_csv}': {exc}", file=sys.stderr)
         sys.exit(1)
 
+    return row_count
+
+
+def main() -> None:
+    args = parse_args()
+    os.makedirs(os.path.dirname(args.output_csv), exist_ok=True)
+
+    # Numeric bounds so the id_int index can be used (see
+    # queries/migrations/add_id_int_columns.sql)
+    min_id = work_id_to_int(args.min_id)
+    max_id = work_id_to_int(args.max_id)
+
+    print(
+        f"[{datetime.now():%Y-%m-%d %H:%M:%S}] "
+        f"Querying works.id_int BETWEEN {min_id} AND {max_id}"
+    )
+
+    params = {"min_id": min_id, "max_id": max_id}
+
+    try:
+        row_count = export_with_copy(params, args.output_csv)
+    except Exception as exc:
+        # COPY needs the raw psycopg connection; fall back to the streamed
+        # SELECT + csv.writer export if it is unavailable
+        print(f"COPY export failed ({exc}); falling back to SELECT.",
+              file=sys.stderr)
+        row_count = export_with_select(params, args.output_csv)
+
     print(
         f"[{datetime.now():%Y-%m-%d %H:%M:%S}] "
         f"Wrote {row_count} rows to '{args.output_csv}'."
@@ -1,29 +1,86 @@
-import csv
-from connecting_postgresql_db import execute_pg_query
+import itertools
+
+from connecting_postgresql_db import get_engine
 
 # -------------------------------------------
 # Fetch all IDs from openalex.works and store them in a CSV file
 # -------------------------------------------
 def fetch_and_save_all_ids(file_path: str) -> None:
     """
-    Query openalex.works for every 'id' (ordered) and write them to a CSV.
+    Export every 'id' from openalex.works (ordered) to a CSV via server-side
+    COPY, so PostgreSQL streams the file directly with no per-row Python work.
 
     Args:
         file_path (str): Destination path for the CSV containing the IDs
     """
     print(f"Fetching all 'id' values from openalex.works and saving to {file_path}...")
+    # Export the numeric id form so downstream range splitting works on
+    # integers (matches the id_int predicates in the parallel query runners)
     query = """
-        SELECT id
+        SELECT id_int AS id
         FROM openalex.works
-        ORDER BY id
-        LIMIT;
+        ORDER BY id_int
     """
-    result = execute_pg_query(query)  # Assumes you have a helper function
-
-    with open(file_path, "w", newline="", encoding="utf-8") as f:
-        writer = csv.writer(f)
-        writer.writerow(["id"])  # Header
-        for row in result:
-            writer.writerow([row[0]])  # Only one column (id)
-    
+
+    conn = get_engine().raw_connection()
+    try:
+        cur = conn.cursor()
+        # The idx_works_id_int index (queries/migrations/
+        # add_id_int_columns.sql) normally serves ORDER BY id_int as an
+        # index-order scan; the work_mem bump covers the case where the
+        # planner picks an explicit sort instead, keeping it in memory
+        # rather than spilling to disk. SET LOCAL scopes it to this
+        # transaction only.
+        cur.execute("SET LOCAL work_mem = '1GB';")
+        with open(file_path, "wb") as f:
+            cur.copy_expert(f"COPY ({query}) TO STDOUT WITH CSV HEADER", f)
+    finally:
+        conn.close()
+
     print(f"Finished saving all IDs to {file_path}.")
+
+
+# -------------------------------------------
+# Stream the exported IDs back without holding them all in RAM
+# -------------------------------------------
+def iter_ids_from_file(file_path: str):
+    """
+    Yield the IDs from a CSV produced by fetch_and_save_all_ids, one at a
+    time.
+
+    A generator rather than a list: at hundreds of millions of IDs, a
+    list of Python strings costs tens of GB of RSS, while streaming keeps
+    memory flat regardless of file size.
+
+    Args:
+        file_path (str): Path to the CSV containing the IDs
+
+    Yields:
+        str: One ID per data line (header skipped).
+    """
+    with open(file_path) as f:
+        next(f)                     # skip header
+        for line in f:
+            yield line.rstrip("\n")
+
+
+def chunk_iter(iterable, chunk_size: int):
+    """
+    Yield lists of up to *chunk_size* items from any iterable.
+
+    Works on generators like iter_ids_from_file — only one chunk is ever
+    materialized at a time.
+
+    Args:
+        iterable: Source of items (list, generator, ...)
+        chunk_size (int): Maximum items per emitted chunk
+
+    Yields:
+        list: The next chunk of items.
+    """
+    it = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(it, chunk_size))
+        if not chunk:
+            return
+        yield chunk
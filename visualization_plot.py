@@ -1,27 +1,36 @@
+import matplotlib
+# Non-interactive Agg backend: no GUI toolkit import or event loop, so
+# plotting works in headless Slurm jobs without $DISPLAY
+matplotlib.use("Agg")
 import matplotlib.pyplot as plt
 
-def plot_bar_chart(data, x_column, y_column, chart_title):
+def plot_bar_chart(data, x_column, y_column, chart_title, out_path):
     """
-    This function takes data in the form of a list of dictionaries,
+    This function takes data as a pandas DataFrame,
     and plots a bar chart based on the specified x and y columns.
 
     Args:
-        data (list of dict): Data to plot, each dictionary represents a data point.
-        x_column (str): The key for the data on the x-axis (e.g., 'year').
-        y_column (str): The key for the data on the y-axis (e.g., 'total_works_count_per_year').
+        data (DataFrame): Data to plot, one column per field
+            (e.g. from get_dataframe_from_pg_db).
+        x_column (str): The column for the data on the x-axis (e.g., 'year').
+        y_column (str): The column for the data on the y-axis (e.g., 'total_works_count_per_year').
         chart_title (str): The title of the chart.
+        out_path (str): Destination path for the rendered PNG.
     """
-    # Extract x and y values
-    x_values = [item[x_column] for item in data]
-    y_values = [item[y_column] for item in data]
+    # Extract x and y values as NumPy arrays — Matplotlib ingests these
+    # through its C path, with no per-element Python objects
+    x_values = data[x_column].to_numpy()
+    y_values = data[y_column].to_numpy()
 
     # Create the bar chart
-    plt.bar(x_values, y_values)
+    fig, ax = plt.subplots()
+    ax.bar(x_values, y_values)
 
     # Add labels and title
-    plt.xlabel(x_column)
-    plt.ylabel(y_column)
-    plt.title(chart_title)
+    ax.set_xlabel(x_column)
+    ax.set_ylabel(y_column)
+    ax.set_title(chart_title)
 
-    # Display the chart
-    plt.show()
\ No newline at end of file
+    # Write the chart to disk and release the figure
+    fig.savefig(out_path, dpi=120)
+    plt.close(fig)
\ No newline at end of file